@@ -1,48 +1,158 @@
 from music21 import *
-from z3 import *
-from typing import List, Dict, Tuple, Set
+import music21
+import numpy as np
+from numba import njit
+from typing import List, Dict, Tuple, Set, Optional
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import hashlib
+import pickle
+import io
+import zipfile
 import json
 from datetime import datetime
+from dataclasses import dataclass, field
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Bound once so the per-element isinstance checks skip the module lookup
+_Note = note.Note
+_Chord = chord.Chord
+_Measure = stream.Measure
+_Part = stream.Part
+_TimeSignature = meter.TimeSignature
+
+# Minor second, tritone and minor seventh: the harshest interval combination
+_HARSH_MASK = (1 << 1) | (1 << 6) | (1 << 10)
+
+@njit(cache=True)
+def find_harsh(pcs: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    # Flag chords containing every interval in _HARSH_MASK
+    harsh = np.zeros(len(offsets) - 1, dtype=np.bool_)
+    for c in range(len(offsets) - 1):
+        start, stop = offsets[c], offsets[c + 1]
+        if stop - start < 3:
+            continue  # Need at least 3 notes for a chord
+        # Encode the chord as a 12-bit pitch-class set
+        pc_mask = 0
+        for i in range(start, stop):
+            pc_mask |= 1 << pcs[i]
+        # Interval d occurs between pitch classes a < b iff bits a and a + d are both set
+        seen_intervals = 0
+        for d in range(1, 12):
+            if pc_mask & (pc_mask >> d):
+                seen_intervals |= 1 << d
+        harsh[c] = (seen_intervals & _HARSH_MASK) == _HARSH_MASK
+    return harsh
+
+def flatten_chords(chords: List[Set[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    # Pack pitch-class sets into one array, chord i spanning offsets[i]:offsets[i+1]
+    offsets = np.zeros(len(chords) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(pcs) for pcs in chords])
+    pcs = np.fromiter((pc for chord_pcs in chords for pc in chord_pcs),
+                      dtype=np.int8, count=offsets[-1])
+    return pcs, offsets
+
+# Aarden-Essen key profiles (music21's default for analyze('key')), one row
+# per candidate key: 12 major tonics then 12 minor tonics, each mean-centred
+# and normalised so a dot product with a centred histogram is a correlation
+_MAJOR_PROFILE = np.array([17.7661, 0.145624, 14.9265, 0.160186, 19.8049, 11.3587,
+                           0.291248, 22.062, 0.145624, 8.15494, 0.232998, 4.95122])
+_MINOR_PROFILE = np.array([18.2648, 0.737619, 14.0499, 16.8599, 0.702494, 14.4362,
+                           0.702494, 18.6161, 4.56621, 1.93186, 7.37619, 1.75623])
+_KEY_PROFILES = np.array([np.roll(_MAJOR_PROFILE, t) for t in range(12)] +
+                         [np.roll(_MINOR_PROFILE, t) for t in range(12)])
+_KEY_PROFILES -= _KEY_PROFILES.mean(axis=1, keepdims=True)
+_KEY_PROFILES /= np.linalg.norm(_KEY_PROFILES, axis=1, keepdims=True)
+_KEY_TONICS = ['C', 'D-', 'D', 'E-', 'E', 'F', 'F#', 'G', 'A-', 'A', 'B-', 'B',
+               'c', 'c#', 'd', 'e-', 'e', 'f', 'f#', 'g', 'g#', 'a', 'b-', 'b']
+
+def estimate_key(pc_histogram: np.ndarray) -> key.Key:
+    # Krumhansl-Schmuckler: pick the key whose profile best correlates with
+    # the duration-weighted pitch-class histogram
+    centred = pc_histogram - pc_histogram.mean()
+    if not centred.any():
+        return key.Key('C')  # No pitch information to go on
+    return key.Key(_KEY_TONICS[int(np.argmax(_KEY_PROFILES @ centred))])
+
+@dataclass
+class ScoreView:
+    # Everything the checks need from a score, gathered in a single traversal
+    notes_per_part: List[List[note.NotRest]] = field(default_factory=list)
+    chords_per_measure: List[List[chord.Chord]] = field(default_factory=list)
+    measures: List[stream.Measure] = field(default_factory=list)
+    time_sigs: List[meter.TimeSignature] = field(default_factory=list)
+    pc_histogram: np.ndarray = field(default_factory=lambda: np.zeros(12, dtype=np.float32))
+
+def _collect(score: stream.Score) -> ScoreView:
+    view = ScoreView()
+    pcs, weights = [], []
+    for elt in score.recurse():
+        if isinstance(elt, (_Note, _Chord)):
+            if view.notes_per_part:
+                view.notes_per_part[-1].append(elt)
+            duration = float(elt.quarterLength)
+            for p in elt.pitches:
+                pcs.append(p.pitchClass)
+                weights.append(duration)
+            # Only chords sitting directly in a measure count as vertical sonorities
+            if isinstance(elt, _Chord) and isinstance(elt.activeSite, _Measure):
+                view.chords_per_measure[-1].append(elt)
+        elif isinstance(elt, _Measure):
+            view.measures.append(elt)
+            view.chords_per_measure.append([])
+        elif isinstance(elt, _Part):
+            view.notes_per_part.append([])
+        elif isinstance(elt, _TimeSignature):
+            view.time_sigs.append(elt)
+    view.pc_histogram = np.bincount(pcs, weights=weights, minlength=12).astype(np.float32)
+    return view
 
 class MozartChecker:
-    def __init__(self):
-        self.solver = Solver()
-        
-    def extract_voice_pairs(self, score: stream.Score) -> List[Tuple[int, int, float]]:
-        voice_pairs = []
+    # Common arpeggiation intervals in Mozart
+    _ARP = frozenset({12, 19, 24, 28, 31})
+    # Mozart often uses dramatic leaps for specific effects
+    _DRAMATIC = frozenset({29, 31, 36, 41})
+    
+    def extract_voice_pairs(self, view: ScoreView) -> Tuple[List[int], List[int], List[float]]:
+        n1, n2, dur = [], [], []
         
-        for part in score.parts:
-            notes = []
-            for note_or_chord in part.recurse().getElementsByClass(['Note', 'Chord']):
+        for part_notes in view.notes_per_part:
+            midis, durations = [], []
+            for note_or_chord in part_notes:
                 duration = note_or_chord.quarterLength
-                if isinstance(note_or_chord, note.Note):
-                    notes.append((note_or_chord.pitch.midi, duration))
-                elif isinstance(note_or_chord, chord.Chord):
+                if isinstance(note_or_chord, _Note):
+                    midis.append(note_or_chord.pitch.midi)
+                    durations.append(duration)
+                elif isinstance(note_or_chord, _Chord):
                     # For chords, consider both outer voices but check context
-                    pitches = sorted([n.midi for n in note_or_chord.pitches])
+                    pitches = note_or_chord.pitches
                     if len(pitches) > 1:
-                        notes.extend([
-                            (pitches[0], duration),  # Bass
-                            (pitches[-1], duration)  # Soprano
-                        ])
+                        lowest = highest = pitches[0].midi
+                        for p in pitches[1:]:
+                            m = p.midi
+                            if m < lowest:
+                                lowest = m
+                            elif m > highest:
+                                highest = m
+                        midis.extend((lowest, highest))  # Bass, Soprano
+                        durations.extend((duration, duration))
             
             # Create pairs with duration context
-            for i in range(len(notes) - 1):
-                voice_pairs.append((notes[i][0], notes[i+1][0], notes[i][1]))
+            n1.extend(midis[:-1])
+            n2.extend(midis[1:])
+            dur.extend(durations[:-1])
                 
-        return voice_pairs
+        return n1, n2, dur
 
-    def check_voice_leading(self, voice_pairs: List[Tuple[int, int, float]]) -> List[str]:
+    def check_voice_leading(self, voice_pairs: Tuple[List[int], List[int], List[float]]) -> List[str]:
         violations = []
         
-        for i, (note1, note2, duration) in enumerate(voice_pairs):
-            n1 = Int(f"note_{i}_1")
-            n2 = Int(f"note_{i}_2")
-            
-            self.solver.add(n1 == note1)
-            self.solver.add(n2 == note2)
-            
+        for i, (note1, note2, duration) in enumerate(zip(*voice_pairs)):
             interval = abs(note2 - note1)
             
             # Mozart-specific voice leading constraints
@@ -56,7 +166,7 @@ class MozartChecker:
             # 2. Special cases for specific musical contexts
             if interval > max_leap:
                 # Check for common Mozart patterns
-                if self.is_arpeggiation_pattern(note1, note2):
+                if self.is_arpeggiation_pattern(interval):
                     continue  # Allow larger leaps in clear arpeggiation patterns
                     
                 if self.is_dramatic_gesture(interval):
@@ -69,85 +179,48 @@ class MozartChecker:
                 
         return violations
 
-    def is_arpeggiation_pattern(self, note1: int, note2: int) -> bool:
-        interval = abs(note2 - note1)
-        
-        # Common arpeggiation intervals in Mozart
-        common_arpeggio_intervals = {
-            12,
-            19, 
-            24,
-            28, 
-            31, 
-        }
-        
-        return interval in common_arpeggio_intervals
+    def is_arpeggiation_pattern(self, interval: int) -> bool:
+        return interval in self._ARP
 
     def is_dramatic_gesture(self, interval: int) -> bool:
-        # Mozart often uses dramatic leaps for specific effects
-        dramatic_intervals = {
-            29,
-            31,
-            36,
-            41,
-        }
-        
-        return interval in dramatic_intervals
+        return interval in self._DRAMATIC
 
-    def check_harmony(self, score: stream.Score) -> List[str]:
+    def check_harmony(self, view: ScoreView) -> List[str]:
         violations = []
-        key = score.analyze('key')
-        tonic_pc = key.tonic.midi % 12
         
         # Get vertical sonorities
         chords = []
-        for measure in score.recurse().getElementsByClass('Measure'):
-            for chord_event in measure.getElementsByClass(['Chord']):
+        for measure_chords in view.chords_per_measure:
+            for chord_event in measure_chords:
                 pcs = {p.midi % 12 for p in chord_event.pitches}
                 if pcs:
                     chords.append(pcs)
         
-        for i, chord_pcs in enumerate(chords):
-            # More flexible harmonic constraints based on Mozart's practice
-            
-            # Allow chromatic alterations common in Mozart
-            allowed_pcs = {
-                tonic_pc,
-                (tonic_pc + 1) % 12,
-                (tonic_pc + 2) % 12,
-                (tonic_pc + 3) % 12,
-                (tonic_pc + 4) % 12,
-                (tonic_pc + 5) % 12,
-                (tonic_pc + 6) % 12,
-                (tonic_pc + 7) % 12,
-                (tonic_pc + 8) % 12,
-                (tonic_pc + 9) % 12,
-                (tonic_pc + 10) % 12,
-                (tonic_pc + 11) % 12,
-            }
-            
-            # Check for highly unusual dissonances only
-            if len(chord_pcs) >= 3:
-                intervals = {(b - a) % 12 for a in chord_pcs for b in chord_pcs if b > a}
-                # Allow more dissonances in development sections and dramatic moments
-                if 1 in intervals and 6 in intervals and 10 in intervals:  # Very harsh combination
-                    violations.append(f"Highly unusual dissonance in measure {i}")
+        # Check for highly unusual dissonances only
+        # Allow more dissonances in development sections and dramatic moments
+        harsh = find_harsh(*flatten_chords(chords))
+        for i in np.flatnonzero(harsh):
+            violations.append(f"Highly unusual dissonance in measure {i}")
                     
         return violations
 
-    def verify_piece(self, score: stream.Score) -> Tuple[bool, List[str]]:
+    def verify_piece(self, score: stream.Score,
+                     view: Optional[ScoreView] = None) -> Tuple[bool, List[str]]:
         violations = []
         
         try:
+            if view is None:
+                view = _collect(score)
+            
             # Extract voice pairs with duration context
-            voice_pairs = self.extract_voice_pairs(score)
+            voice_pairs = self.extract_voice_pairs(view)
             
             # Check voice leading
             voice_leading_violations = self.check_voice_leading(voice_pairs)
             violations.extend(voice_leading_violations)
             
             # Check harmony
-            harmonic_violations = self.check_harmony(score)
+            harmonic_violations = self.check_harmony(view)
             violations.extend(harmonic_violations)
             
             # Only report truly unusual violations
@@ -163,73 +236,207 @@ class MozartChecker:
         except Exception as e:
             return False, [f"Analysis error: {str(e)}"]
 
+# Parsed scores are pickled under ~/.cache/mozart_checker, one entry per
+# source file; a pickle is typically dozens of times larger than its score.
+# Stale entries for a file are replaced when it is re-parsed, but entries for
+# deleted or moved files stay until the directory is removed by hand
+CACHE_DIR = Path.home() / ".cache" / "mozart_checker"
+CACHE_VERSION = 2
+SUFFIXES = {".xml", ".mxl", ".musicxml"}
+
+BATCH_SIZE = 4
+
+def _cache_prefix(path: str) -> str:
+    # Shared by every cache entry ever written for this path
+    return hashlib.blake2b(os.path.abspath(path).encode(), digest_size=16).hexdigest()
+
+def _cache_file(path: str) -> Path:
+    # Parsed scores are cached on disk keyed by the file's path, mtime and size,
+    # and by the music21 version that built the pickled objects
+    stat = os.stat(path)
+    state_key = hashlib.blake2b(
+        f"{CACHE_VERSION}:{music21.__version__}:{stat.st_mtime_ns}:{stat.st_size}".encode(),
+        digest_size=16
+    ).hexdigest()
+    return CACHE_DIR / f"{_cache_prefix(path)}-{state_key}.pkl"
+
+def _read_source(path: str) -> Optional[bytes]:
+    # Raw file contents for parsing, or None when a cached parse will be used
+    if _cache_file(path).exists():
+        return None
+    return Path(path).read_bytes()
+
+def _parse_bytes(data: bytes, path: str) -> stream.Score:
+    if Path(path).suffix.lower() == ".mxl":
+        # Compressed MusicXML: the score is the first XML file outside META-INF
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for name in archive.namelist():
+                if not name.startswith("META-INF") and Path(name).suffix.lower() in (".xml", ".musicxml"):
+                    data = archive.read(name)
+                    break
+            else:
+                raise ValueError(f"No MusicXML score found in {Path(path).name}")
+    return converter.parseData(data, format='musicxml')
+
+def load_score(path: str, data: Optional[bytes] = None) -> stream.Score:
+    # The cache is best-effort: any problem reading or writing it falls back
+    # to parsing the source file
+    cache_file = _cache_file(path)
+    
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Truncated or unreadable entry: drop it and parse again
+            try:
+                cache_file.unlink()
+            except OSError:
+                pass
+    
+    # Our cache replaces music21's own pickle cache, so don't let it store a second copy
+    score = (_parse_bytes(data, path) if data is not None
+             else converter.parse(path, forceSource=True, storePickle=False))
+    
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        # Derived stream caches may hold weak references, which cannot be pickled
+        for st in score.recurse(streamsOnly=True, includeSelf=True):
+            st.clearCache()
+        
+        # Write to a temporary file first so concurrent workers never read a partial pickle
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(score, f, protocol=5)
+        os.replace(tmp_file, cache_file)
+        
+        # Entries for older versions of this file can never be hit again
+        for stale in CACHE_DIR.glob(f"{_cache_prefix(path)}-*.pkl"):
+            if stale != cache_file:
+                stale.unlink(missing_ok=True)
+    except Exception:
+        try:
+            tmp_file.unlink()
+        except OSError:
+            pass
+    
+    return score
+
+def _warmup():
+    # Runs once per worker process: pay music21's lazy MusicXML importer setup
+    # and the Numba kernel load up front instead of on the first real file
+    environment.Environment()['warnings'] = 0
+    try:
+        converter.parse('<?xml version="1.0"?><score-partwise/>', format='musicxml')
+    except Exception:
+        pass
+    find_harsh(*flatten_chords([]))
+
+def _analyze_one(path: str, data: Optional[bytes] = None) -> dict:
+    xml_file = Path(path)
+    try:
+        checker = MozartChecker()
+        score = load_score(path, data)
+        view = _collect(score)
+        key = estimate_key(view.pc_histogram)
+        # Like score.getTimeSignatures(), fall back to 4/4 when none is notated
+        time_sig = view.time_sigs[0] if view.time_sigs else meter.TimeSignature('4/4')
+        
+        is_valid, violations = checker.verify_piece(score, view)
+        
+        return {
+            "filename": xml_file.name,
+            "key": str(key),
+            "time_signature": str(time_sig),
+            "measures": len(view.measures),
+            "valid": is_valid,
+            "violations": violations
+        }
+        
+    except Exception as e:
+        return {
+            "filename": xml_file.name,
+            "error": str(e)
+        }
+
+def _analyze_batch(paths: List[str]) -> List[dict]:
+    # Read the next file off disk while the current one is parsed and checked
+    analyses = []
+    with ThreadPoolExecutor(max_workers=2) as reader:
+        pending = reader.submit(_read_source, paths[0]) if paths else None
+        for i, path in enumerate(paths):
+            try:
+                data = pending.result()
+            except OSError:
+                data = None  # Let the regular parse report the problem
+            if i + 1 < len(paths):
+                pending = reader.submit(_read_source, paths[i + 1])
+            analyses.append(_analyze_one(path, data))
+    return analyses
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
 def analyze_mozart_works(folder_path: str, output_file: str = "mozart_analysis_results.json"):
-    checker = MozartChecker()
     results = {
         "timestamp": datetime.now().isoformat(),
         "total_files": 0,
         "valid_files": 0,
-        "files_with_violations": 0,
-        "analyses": []
+        "files_with_violations": 0
     }
     
     print("\nMOZART STYLE ANALYSIS")
     print("=" * 50)
     
-    xml_files = list(Path(folder_path).glob("*.xml")) + \
-                list(Path(folder_path).glob("*.mxl")) + \
-                list(Path(folder_path).glob("*.musicxml"))
+    # One directory pass instead of a glob per suffix; a missing folder has no files
+    xml_files = []
+    if os.path.isdir(folder_path):
+        with os.scandir(folder_path) as it:
+            xml_files = sorted(Path(e.path) for e in it
+                               if e.is_file() and Path(e.name).suffix.lower() in SUFFIXES)
     
     results["total_files"] = len(xml_files)
     print(f"\nFound {len(xml_files)} files in {folder_path}")
     
-    for xml_file in xml_files:
-        try:
-            print(f"\nAnalyzing {xml_file.name}...")
-            score = converter.parse(str(xml_file))
-            
-            key = score.analyze('key')
-            time_sigs = score.getTimeSignatures()
-            time_sig = time_sigs[0] if time_sigs else None
-            
-            is_valid, violations = checker.verify_piece(score)
+    # Analyses are streamed to a JSON Lines file as they complete;
+    # only the counts are kept in memory for the summary
+    analyses_file = Path(f"{output_file}.jsonl")
+    results["analyses_file"] = str(analyses_file)
+    
+    # Files are independent, so parse and check them in parallel processes
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_warmup) as ex, \
+            open(analyses_file, 'wb') as out:
+        paths = [str(p) for p in xml_files]
+        batches = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+        for analysis in (a for batch in ex.map(_analyze_batch, batches) for a in batch):
+            out.write(_dumps(analysis) + b"\n")
+            out.flush()
             
-            analysis = {
-                "filename": xml_file.name,
-                "key": str(key),
-                "time_signature": str(time_sig),
-                "measures": len(list(score.recurse().getElementsByClass('Measure'))),
-                "valid": is_valid,
-                "violations": violations
-            }
+            print(f"\nAnalyzed {analysis['filename']}")
+            if "error" in analysis:
+                print(f"Error analyzing {analysis['filename']}: {analysis['error']}")
+                continue
             
-            if is_valid:
+            if analysis["valid"]:
                 results["valid_files"] += 1
             else:
                 results["files_with_violations"] += 1
             
-            results["analyses"].append(analysis)
-            
-            print(f"Key: {key}")
-            print(f"Time Signature: {time_sig}")
+            print(f"Key: {analysis['key']}")
+            print(f"Time Signature: {analysis['time_signature']}")
             print(f"Measures: {analysis['measures']}")
-            if violations:
+            if analysis["violations"]:
                 print("⚠️ Potential style deviations found:")
-                for v in violations:
+                for v in analysis["violations"]:
                     print(f"  - {v}")
             else:
                 print("✓ Consistent with Mozart's style")
-            
-        except Exception as e:
-            print(f"Error analyzing {xml_file.name}: {str(e)}")
-            results["analyses"].append({
-                "filename": xml_file.name,
-                "error": str(e)
-            })
     
     with open(output_file, 'w') as f:
         json.dump(results, f, indent=2)
-    print(f"\nResults saved to {output_file}")
+    print(f"\nResults saved to {output_file} (per-file analyses in {analyses_file})")
     
     print("\nANALYSIS SUMMARY")
     print("=" * 50)
@@ -1,126 +1,174 @@
 from music21 import *
+import music21
 from z3 import *
-from typing import List, Dict, Tuple, Set
+import numpy as np
+from numba import njit
+from typing import List, Dict, Tuple, Set, Optional
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import os
+import hashlib
+import pickle
+import io
+import contextlib
+import zipfile
 import json
 from datetime import datetime
+from dataclasses import dataclass, field
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Bound once so the per-element isinstance checks skip the module lookup
+_Note = note.Note
+_Chord = chord.Chord
+_Measure = stream.Measure
+_Part = stream.Part
+_TimeSignature = meter.TimeSignature
+
+# Minor second, tritone and minor seventh: the harshest interval combination
+_HARSH_MASK = (1 << 1) | (1 << 6) | (1 << 10)
+
+@njit(cache=True)
+def find_harsh(pcs: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    # Flag chords containing every interval in _HARSH_MASK
+    harsh = np.zeros(len(offsets) - 1, dtype=np.bool_)
+    for c in range(len(offsets) - 1):
+        start, stop = offsets[c], offsets[c + 1]
+        if stop - start < 3:
+            continue  # Need at least 3 notes for a chord
+        # Encode the chord as a 12-bit pitch-class set
+        pc_mask = 0
+        for i in range(start, stop):
+            pc_mask |= 1 << pcs[i]
+        # Interval d occurs between pitch classes a < b iff bits a and a + d are both set
+        seen_intervals = 0
+        for d in range(1, 12):
+            if pc_mask & (pc_mask >> d):
+                seen_intervals |= 1 << d
+        harsh[c] = (seen_intervals & _HARSH_MASK) == _HARSH_MASK
+    return harsh
+
+def flatten_chords(chords: List[Set[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    # Pack pitch-class sets into one array, chord i spanning offsets[i]:offsets[i+1]
+    offsets = np.zeros(len(chords) + 1, dtype=np.int32)
+    offsets[1:] = np.cumsum([len(pcs) for pcs in chords])
+    pcs = np.fromiter((pc for chord_pcs in chords for pc in chord_pcs),
+                      dtype=np.int8, count=offsets[-1])
+    return pcs, offsets
+
+# Aarden-Essen key profiles (music21's default for analyze('key')), one row
+# per candidate key: 12 major tonics then 12 minor tonics, each mean-centred
+# and normalised so a dot product with a centred histogram is a correlation
+_MAJOR_PROFILE = np.array([17.7661, 0.145624, 14.9265, 0.160186, 19.8049, 11.3587,
+                           0.291248, 22.062, 0.145624, 8.15494, 0.232998, 4.95122])
+_MINOR_PROFILE = np.array([18.2648, 0.737619, 14.0499, 16.8599, 0.702494, 14.4362,
+                           0.702494, 18.6161, 4.56621, 1.93186, 7.37619, 1.75623])
+_KEY_PROFILES = np.array([np.roll(_MAJOR_PROFILE, t) for t in range(12)] +
+                         [np.roll(_MINOR_PROFILE, t) for t in range(12)])
+_KEY_PROFILES -= _KEY_PROFILES.mean(axis=1, keepdims=True)
+_KEY_PROFILES /= np.linalg.norm(_KEY_PROFILES, axis=1, keepdims=True)
+_KEY_TONICS = ['C', 'D-', 'D', 'E-', 'E', 'F', 'F#', 'G', 'A-', 'A', 'B-', 'B',
+               'c', 'c#', 'd', 'e-', 'e', 'f', 'f#', 'g', 'g#', 'a', 'b-', 'b']
+
+def estimate_key(pc_histogram: np.ndarray) -> key.Key:
+    # Krumhansl-Schmuckler: pick the key whose profile best correlates with
+    # the duration-weighted pitch-class histogram
+    centred = pc_histogram - pc_histogram.mean()
+    if not centred.any():
+        return key.Key('C')  # No pitch information to go on
+    return key.Key(_KEY_TONICS[int(np.argmax(_KEY_PROFILES @ centred))])
+
+@dataclass
+class ScoreView:
+    # Everything the checks need from a score, gathered in a single traversal
+    notes_per_part: List[List[note.NotRest]] = field(default_factory=list)
+    chords_per_measure: List[List[chord.Chord]] = field(default_factory=list)
+    measures: List[stream.Measure] = field(default_factory=list)
+    time_sigs: List[meter.TimeSignature] = field(default_factory=list)
+    pc_histogram: np.ndarray = field(default_factory=lambda: np.zeros(12, dtype=np.float32))
+
+def _collect(score: stream.Score) -> ScoreView:
+    view = ScoreView()
+    pcs, weights = [], []
+    for elt in score.recurse():
+        if isinstance(elt, (_Note, _Chord)):
+            if view.notes_per_part:
+                view.notes_per_part[-1].append(elt)
+            duration = float(elt.quarterLength)
+            for p in elt.pitches:
+                pcs.append(p.pitchClass)
+                weights.append(duration)
+            # Only chords sitting directly in a measure count as vertical sonorities
+            if isinstance(elt, _Chord) and isinstance(elt.activeSite, _Measure):
+                view.chords_per_measure[-1].append(elt)
+        elif isinstance(elt, _Measure):
+            view.measures.append(elt)
+            view.chords_per_measure.append([])
+        elif isinstance(elt, _Part):
+            view.notes_per_part.append([])
+        elif isinstance(elt, _TimeSignature):
+            view.time_sigs.append(elt)
+    view.pc_histogram = np.bincount(pcs, weights=weights, minlength=12).astype(np.float32)
+    return view
 
 class MozartChecker:
-    def __init__(self):
-        self.solver = Solver()
-        
-    def extract_voice_pairs(self, score: stream.Score) -> List[Tuple[int, int, float]]:
-        voice_pairs = []
+    # Intervals (in semitones) accepted beyond the plain leap limits
+    LONG_NOTE_LEAPS = np.array([19, 24])  # Compound fifth, two octaves in arpeggios
+    DRAMATIC_LEAPS = np.array([29, 31, 36, 41])  # Dramatic gestures Mozart sometimes uses
+
+    def extract_voice_pairs(self, view: ScoreView) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        n1, n2, dur = [], [], []
         
-        for part in score.parts:
-            notes = []
-            for note_or_chord in part.recurse().getElementsByClass(['Note', 'Chord']):
+        for part_notes in view.notes_per_part:
+            midis, durations = [], []
+            for note_or_chord in part_notes:
                 duration = note_or_chord.quarterLength
-                if isinstance(note_or_chord, note.Note):
-                    notes.append((note_or_chord.pitch.midi, duration))
-                elif isinstance(note_or_chord, chord.Chord):
+                if isinstance(note_or_chord, _Note):
+                    midis.append(note_or_chord.pitch.midi)
+                    durations.append(duration)
+                elif isinstance(note_or_chord, _Chord):
                     # For chords, consider both outer voices
-                    pitches = sorted([n.midi for n in note_or_chord.pitches])
+                    pitches = note_or_chord.pitches
                     if len(pitches) > 1:
-                        notes.extend([
-                            (pitches[0], duration),  # Bass
-                            (pitches[-1], duration)  # Soprano
-                        ])
+                        lowest = highest = pitches[0].midi
+                        for p in pitches[1:]:
+                            m = p.midi
+                            if m < lowest:
+                                lowest = m
+                            elif m > highest:
+                                highest = m
+                        midis.extend((lowest, highest))  # Bass, Soprano
+                        durations.extend((duration, duration))
             
             # Create pairs with duration context
-            for i in range(len(notes) - 1):
-                voice_pairs.append((notes[i][0], notes[i+1][0], notes[i][1]))
+            n1.extend(midis[:-1])
+            n2.extend(midis[1:])
+            dur.extend(durations[:-1])
                 
-        return voice_pairs
+        return (np.asarray(n1, dtype=np.int16),
+                np.asarray(n2, dtype=np.int16),
+                np.asarray(dur, dtype=np.float32))
 
-    def check_voice_leading(self, voice_pairs: List[Tuple[int, int, float]]) -> List[str]:
-        s = Solver()
-        
-        formula_str = "Voice Leading Formula:\n"
-    
-        constraint_data = []
-        
-        for i, (note1, note2, duration) in enumerate(voice_pairs):
-            # Note pair
-            n1 = Int(f"note_{i}_1")
-            n2 = Int(f"note_{i}_2")
-            
-            # Add constraints
-            s.add(n1 == note1)
-            s.add(n2 == note2)
-            
-            # Calculate the interval between notes
-            interval_var = Int(f"interval_{i}")
-            s.add(interval_var == Abs(n2 - n1))
-            
-            constraint_name = f"voice_leading_{i}"
-            leap_constraint = Bool(constraint_name)
-            
-            # Define legal interval
-            if duration >= 1.0:
-                acceptable_intervals = Or(
-                    interval_var <= 12,  
-                    interval_var == 19, 
-                    And(interval_var == 24, self.is_arpeggiation_context(note1, note2))  # Two octaves in arpeggios
-                )
-            else:
-                acceptable_intervals = Or(
-                    interval_var <= 24,
-                    interval_var == 31, 
-                    self.is_dramatic_gesture_formula(interval_var)
-                )
-            
-            s.add(leap_constraint == acceptable_intervals)
-            
-            formula_str += f"  {constraint_name} := {leap_constraint} == {acceptable_intervals}\n"
-            formula_str += f"  Where note_{i}_1 = {note1}, note_{i}_2 = {note2}, interval_{i} = {abs(note2 - note1)}\n\n"
-            
-            constraint_data.append((constraint_name, leap_constraint, note1, note2, interval_var))
-        
-        print(formula_str)
-        print(f"Full SMT Formula:\n{s}")
-        
-        check_result = s.check()
-        print(f"Satisfiability result: {check_result}")
-        
-        violations = []
-        if check_result == unsat:
-
-            for name, constraint, note1, note2, interval_var in constraint_data:
-                # Create a separate solver for each constraint
-                test_solver = Solver()
-                idx = name.split('_')[-1]
-                n1 = Int(f"note_{idx}_1")
-                n2 = Int(f"note_{idx}_2")
-                test_solver.add(n1 == note1)
-                test_solver.add(n2 == note2)
-                test_solver.add(interval_var == Abs(n2 - n1))
-                
-                test_solver.add(Not(constraint))
-                if test_solver.check() == sat:
-                    # This constraint is violated
-                    actual_interval = abs(note2 - note1)
-                    violations.append(f"Unusual leap ({actual_interval} semitones) at position {idx}")
-        
-        return violations
-        
-    def is_arpeggiation_context(self, note1: int, note2: int) -> bool:
-        interval = abs(note2 - note1)
-        common_arpeggio_intervals = {12, 19, 24}
-        return interval in common_arpeggio_intervals
+    def check_voice_leading(self, voice_pairs: Tuple[np.ndarray, np.ndarray, np.ndarray]) -> List[str]:
+        n1, n2, dur = voice_pairs
+        interval = np.abs(n2 - n1)
         
-    def is_dramatic_gesture_formula(self, interval_var):
-        # Define the dramatic intervals Mozart sometimes uses
-        return Or(
-            interval_var == 29,
-            interval_var == 31,
-            interval_var == 36,
-            interval_var == 41
+        # Both notes of every pair are fixed, so the leap constraints reduce to
+        # plain arithmetic over all pairs at once
+        long_note = dur >= 1.0
+        acceptable = np.where(
+            long_note,
+            (interval <= 12) | np.isin(interval, self.LONG_NOTE_LEAPS),
+            (interval <= 24) | np.isin(interval, self.DRAMATIC_LEAPS)
         )
+        
+        return [f"Unusual leap ({interval[i]} semitones) at position {i}"
+                for i in np.flatnonzero(~acceptable)]
 
-    def check_harmony(self, score: stream.Score) -> List[str]:
-        key = score.analyze('key')
-        tonic_pc = key.tonic.midi % 12
+    def check_harmony(self, view: ScoreView) -> List[str]:
         violations = []
         
         s = Solver()
@@ -129,14 +177,17 @@ class MozartChecker:
         
         # Get vertical sonorities (chords)
         chords = []
-        for measure in score.recurse().getElementsByClass('Measure'):
-            for chord_event in measure.getElementsByClass(['Chord']):
+        for measure_chords in view.chords_per_measure:
+            for chord_event in measure_chords:
                 pcs = {p.midi % 12 for p in chord_event.pitches}
                 if pcs:
                     chords.append(pcs)
         
         constraint_data = []
         
+        # Check for harsh dissonances in every chord at once
+        harsh = find_harsh(*flatten_chords(chords))
+        
         for i, chord_pcs in enumerate(chords):
             if len(chord_pcs) < 3:
                 continue  # Skip analysis for intervals (need at least 3 notes for a chord)
@@ -145,24 +196,7 @@ class MozartChecker:
             constraint_name = f"harmony_{i}"
             harmony_constraint = Bool(constraint_name)
             
-            # Create variables for each pitch class in the chord
-            chord_vars = []
-            for j, pc in enumerate(chord_pcs):
-                pc_var = Int(f"chord_{i}_pc_{j}")
-                s.add(pc_var == pc)
-                chord_vars.append(pc_var)
-            
-            # Check for harsh dissonances
-            harsh_dissonance = False
-            for a_idx, a in enumerate(chord_vars):
-                for b_idx, b in enumerate(chord_vars):
-                    if a_idx < b_idx:  # Avoid duplicate pairs
-                        interval_var = Int(f"interval_{i}_{a_idx}_{b_idx}")
-                        s.add(interval_var == (b - a) % 12)
-                        
-                        # Check for combination of harsh intervals
-                        if interval_var == 1 and interval_var == 6 and interval_var == 10:
-                            harsh_dissonance = True
+            harsh_dissonance = BoolVal(bool(harsh[i]))
             
             s.add(harmony_constraint == Not(harsh_dissonance))
             
@@ -175,33 +209,39 @@ class MozartChecker:
         print(formula_str)
         print(f"Full Harmony SMT Formula:\n{s}")
         
-        # Check if all constraints are satisfied
+        # Every chord constraint is pinned to a constant, so a single check
+        # decides all of them and the model names the violated ones
         check_result = s.check()
         print(f"Harmony satisfiability result: {check_result}")
         
-        if check_result == unsat:
-            # Find which constraints are violated
-            for name, constraint, measure_idx in constraint_data:
-                test_solver = Solver()
-                test_solver.add(Not(constraint))
-                if test_solver.check() == sat:
-                    violations.append(f"Highly unusual dissonance in measure {measure_idx}")
+        violated = []
+        if check_result == sat:
+            model = s.model()
+            violated = [measure_idx for _, constraint, measure_idx in constraint_data
+                        if is_false(model.eval(constraint, model_completion=True))]
+        
+        for measure_idx in sorted(violated):
+            violations.append(f"Highly unusual dissonance in measure {measure_idx}")
         
         return violations
 
-    def verify_piece(self, score: stream.Score) -> Tuple[bool, List[str]]:
+    def verify_piece(self, score: stream.Score,
+                     view: Optional[ScoreView] = None) -> Tuple[bool, List[str]]:
         violations = []
         
         try:
+            if view is None:
+                view = _collect(score)
+            
             # Extract voice pairs with duration context
-            voice_pairs = self.extract_voice_pairs(score)
+            voice_pairs = self.extract_voice_pairs(view)
             
-            # Check voice leading using SMT
+            # Check voice leading with the vectorized interval test
             voice_leading_violations = self.check_voice_leading(voice_pairs)
             violations.extend(voice_leading_violations)
             
             # Check harmony using SMT
-            harmonic_violations = self.check_harmony(score)
+            harmonic_violations = self.check_harmony(view)
             violations.extend(harmonic_violations)
             
             # Mozart-specific threshold: allow more expressive freedom
@@ -212,73 +252,215 @@ class MozartChecker:
         except Exception as e:
             return False, [f"Analysis error: {str(e)}"]
 
+# Parsed scores are pickled under ~/.cache/mozart_checker, one entry per
+# source file; a pickle is typically dozens of times larger than its score.
+# Stale entries for a file are replaced when it is re-parsed, but entries for
+# deleted or moved files stay until the directory is removed by hand
+CACHE_DIR = Path.home() / ".cache" / "mozart_checker"
+CACHE_VERSION = 2
+SUFFIXES = {".xml", ".mxl", ".musicxml"}
+
+BATCH_SIZE = 4
+
+def _cache_prefix(path: str) -> str:
+    # Shared by every cache entry ever written for this path
+    return hashlib.blake2b(os.path.abspath(path).encode(), digest_size=16).hexdigest()
+
+def _cache_file(path: str) -> Path:
+    # Parsed scores are cached on disk keyed by the file's path, mtime and size,
+    # and by the music21 version that built the pickled objects
+    stat = os.stat(path)
+    state_key = hashlib.blake2b(
+        f"{CACHE_VERSION}:{music21.__version__}:{stat.st_mtime_ns}:{stat.st_size}".encode(),
+        digest_size=16
+    ).hexdigest()
+    return CACHE_DIR / f"{_cache_prefix(path)}-{state_key}.pkl"
+
+def _read_source(path: str) -> Optional[bytes]:
+    # Raw file contents for parsing, or None when a cached parse will be used
+    if _cache_file(path).exists():
+        return None
+    return Path(path).read_bytes()
+
+def _parse_bytes(data: bytes, path: str) -> stream.Score:
+    if Path(path).suffix.lower() == ".mxl":
+        # Compressed MusicXML: the score is the first XML file outside META-INF
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            for name in archive.namelist():
+                if not name.startswith("META-INF") and Path(name).suffix.lower() in (".xml", ".musicxml"):
+                    data = archive.read(name)
+                    break
+            else:
+                raise ValueError(f"No MusicXML score found in {Path(path).name}")
+    return converter.parseData(data, format='musicxml')
+
+def load_score(path: str, data: Optional[bytes] = None) -> stream.Score:
+    # The cache is best-effort: any problem reading or writing it falls back
+    # to parsing the source file
+    cache_file = _cache_file(path)
+    
+    if cache_file.exists():
+        try:
+            with open(cache_file, 'rb') as f:
+                return pickle.load(f)
+        except Exception:
+            # Truncated or unreadable entry: drop it and parse again
+            try:
+                cache_file.unlink()
+            except OSError:
+                pass
+    
+    # Our cache replaces music21's own pickle cache, so don't let it store a second copy
+    score = (_parse_bytes(data, path) if data is not None
+             else converter.parse(path, forceSource=True, storePickle=False))
+    
+    tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        # Derived stream caches may hold weak references, which cannot be pickled
+        for st in score.recurse(streamsOnly=True, includeSelf=True):
+            st.clearCache()
+        
+        # Write to a temporary file first so concurrent workers never read a partial pickle
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(tmp_file, 'wb') as f:
+            pickle.dump(score, f, protocol=5)
+        os.replace(tmp_file, cache_file)
+        
+        # Entries for older versions of this file can never be hit again
+        for stale in CACHE_DIR.glob(f"{_cache_prefix(path)}-*.pkl"):
+            if stale != cache_file:
+                stale.unlink(missing_ok=True)
+    except Exception:
+        try:
+            tmp_file.unlink()
+        except OSError:
+            pass
+    
+    return score
+
+def _warmup():
+    # Runs once per worker process: pay music21's lazy MusicXML importer setup
+    # and the Numba kernel load up front instead of on the first real file
+    environment.Environment()['warnings'] = 0
+    try:
+        converter.parse('<?xml version="1.0"?><score-partwise/>', format='musicxml')
+    except Exception:
+        pass
+    find_harsh(*flatten_chords([]))
+
+def _analyze_one(path: str, data: Optional[bytes] = None) -> dict:
+    xml_file = Path(path)
+    # The checker prints its SMT formulas; capture them so the parent can show
+    # them next to this file's report instead of interleaved across workers
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            checker = MozartChecker()
+            score = load_score(path, data)
+            view = _collect(score)
+            key = estimate_key(view.pc_histogram)
+            # Like score.getTimeSignatures(), fall back to 4/4 when none is notated
+            time_sig = view.time_sigs[0] if view.time_sigs else meter.TimeSignature('4/4')
+            
+            is_valid, violations = checker.verify_piece(score, view)
+        
+        return {
+            "filename": xml_file.name,
+            "key": str(key),
+            "time_signature": str(time_sig),
+            "measures": len(view.measures),
+            "valid": is_valid,
+            "violations": violations,
+            "log": log.getvalue()
+        }
+        
+    except Exception as e:
+        return {
+            "filename": xml_file.name,
+            "error": str(e),
+            "log": log.getvalue()
+        }
+
+def _analyze_batch(paths: List[str]) -> List[dict]:
+    # Read the next file off disk while the current one is parsed and checked
+    analyses = []
+    with ThreadPoolExecutor(max_workers=2) as reader:
+        pending = reader.submit(_read_source, paths[0]) if paths else None
+        for i, path in enumerate(paths):
+            try:
+                data = pending.result()
+            except OSError:
+                data = None  # Let the regular parse report the problem
+            if i + 1 < len(paths):
+                pending = reader.submit(_read_source, paths[i + 1])
+            analyses.append(_analyze_one(path, data))
+    return analyses
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode()
+
 def analyze_mozart_works(folder_path: str, output_file: str = "mozart_analysis_results.json"):
-    checker = MozartChecker()
     results = {
         "timestamp": datetime.now().isoformat(),
         "total_files": 0,
         "valid_files": 0,
-        "files_with_violations": 0,
-        "analyses": []
+        "files_with_violations": 0
     }
     
     print("\nMOZART STYLE ANALYSIS")
     print("=" * 50)
     
-    xml_files = list(Path(folder_path).glob("*.xml")) + \
-                list(Path(folder_path).glob("*.mxl")) + \
-                list(Path(folder_path).glob("*.musicxml"))
+    # One directory pass instead of a glob per suffix; a missing folder has no files
+    xml_files = []
+    if os.path.isdir(folder_path):
+        with os.scandir(folder_path) as it:
+            xml_files = sorted(Path(e.path) for e in it
+                               if e.is_file() and Path(e.name).suffix.lower() in SUFFIXES)
     
     results["total_files"] = len(xml_files)
     print(f"\nFound {len(xml_files)} files in {folder_path}")
     
-    for xml_file in xml_files:
-        try:
-            print(f"\nAnalyzing {xml_file.name}...")
-            score = converter.parse(str(xml_file))
-            
-            key = score.analyze('key')
-            time_sigs = score.getTimeSignatures()
-            time_sig = time_sigs[0] if time_sigs else None
-            
-            is_valid, violations = checker.verify_piece(score)
+    # Analyses are streamed to a JSON Lines file as they complete;
+    # only the counts are kept in memory for the summary
+    analyses_file = Path(f"{output_file}.jsonl")
+    results["analyses_file"] = str(analyses_file)
+    
+    # Files are independent, so parse and check them in parallel processes
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_warmup) as ex, \
+            open(analyses_file, 'wb') as out:
+        paths = [str(p) for p in xml_files]
+        batches = [paths[i:i + BATCH_SIZE] for i in range(0, len(paths), BATCH_SIZE)]
+        for analysis in (a for batch in ex.map(_analyze_batch, batches) for a in batch):
+            log = analysis.pop("log", "")
+            out.write(_dumps(analysis) + b"\n")
+            out.flush()
             
-            analysis = {
-                "filename": xml_file.name,
-                "key": str(key),
-                "time_signature": str(time_sig),
-                "measures": len(list(score.recurse().getElementsByClass('Measure'))),
-                "valid": is_valid,
-                "violations": violations
-            }
+            print(f"\nAnalyzed {analysis['filename']}")
+            print(log, end="")
+            if "error" in analysis:
+                print(f"Error analyzing {analysis['filename']}: {analysis['error']}")
+                continue
             
-            if is_valid:
+            if analysis["valid"]:
                 results["valid_files"] += 1
             else:
                 results["files_with_violations"] += 1
             
-            results["analyses"].append(analysis)
-            
-            print(f"Key: {key}")
-            print(f"Time Signature: {time_sig}")
+            print(f"Key: {analysis['key']}")
+            print(f"Time Signature: {analysis['time_signature']}")
             print(f"Measures: {analysis['measures']}")
-            if violations:
+            if analysis["violations"]:
                 print("⚠️ Potential style deviations found:")
-                for v in violations:
+                for v in analysis["violations"]:
                     print(f"  - {v}")
             else:
                 print("✓ Consistent with Mozart's style")
-            
-        except Exception as e:
-            print(f"Error analyzing {xml_file.name}: {str(e)}")
-            results["analyses"].append({
-                "filename": xml_file.name,
-                "error": str(e)
-            })
     
     with open(output_file, 'w') as f:
         json.dump(results, f, indent=2)
-    print(f"\nResults saved to {output_file}")
+    print(f"\nResults saved to {output_file} (per-file analyses in {analyses_file})")
     
     print("\nANALYSIS SUMMARY")
     print("=" * 50)